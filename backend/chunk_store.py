@@ -0,0 +1,44 @@
+import uuid
+from typing import List
+
+from langchain_community.vectorstores import SupabaseVectorStore
+from langchain.schema import Document
+
+from gemini_clients import get_embeddings
+from embedding_profiles import get_write_profiles, reduce_dimensions
+
+
+def store_chunks(supabase, docs: List[Document], google_api_key: str) -> List[str]:
+    """Embed chunks once and write them to every profile in get_write_profiles().
+
+    Vectors are requested at the largest dimension any target needs and reduced per table,
+    so dual-writing during a migration costs no extra Gemini calls. The same ids are used in
+    every table, which keeps the backfill (an upsert by id) idempotent.
+    """
+    profiles = get_write_profiles()
+    embeddings = get_embeddings(google_api_key, dimensions=max(p.dimensions for p in profiles))
+    vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+    ids = [str(uuid.uuid4()) for _ in docs]
+
+    # The active profile's table is what queries read, so its errors propagate
+    active, mirrors = profiles[0], profiles[1:]
+    _write(supabase, embeddings, active, vectors, docs, ids)
+    for profile in mirrors:
+        try:
+            _write(supabase, embeddings, profile, vectors, docs, ids)
+        except Exception as mirror_err:
+            # The document stays searchable. Re-running the backfill repairs a missed compact
+            # mirror; a missed full-table write only matters if you switch back to `full`.
+            print(f"Mirror Write Error ('{profile.table_name}'): {mirror_err}")
+    return ids
+
+
+def _write(supabase, embeddings, profile, vectors, docs, ids):
+    store = SupabaseVectorStore(
+        client=supabase,
+        embedding=embeddings,
+        table_name=profile.table_name,
+        query_name=profile.query_name,
+    )
+    store.add_vectors([reduce_dimensions(v, profile.dimensions) for v in vectors], docs, ids)
+    print(f"DEBUG: Stored {len(docs)} chunks in '{profile.table_name}'")
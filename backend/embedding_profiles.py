@@ -0,0 +1,100 @@
+import os
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+# gemini-embedding-001 returns 3072 dims and is Matryoshka-trained: the first N values of a
+# full vector are what the API returns for output_dimensionality=N. Only the 3072-dim output
+# is unit length, so reduced vectors are re-normalized before storage.
+FULL_DIMENSIONS = 3072
+
+
+@dataclass(frozen=True)
+class EmbeddingProfile:
+    name: str
+    dimensions: int
+    table_name: str
+    query_name: str
+    # Precision of the ANN index ("float", "half" or "binary")
+    quantization: str = "float"
+    # Precision of the stored vectors ("float" or "half"). Float rows let the SQL function
+    # re-rank quantized index candidates at full precision.
+    storage: str = "float"
+    # How many index candidates to re-rank per requested match (None = no re-rank pass).
+    rerank_factor: Optional[int] = None
+
+    @property
+    def is_compact(self) -> bool:
+        return self.dimensions < FULL_DIMENSIONS
+
+    def rpc_params(self, match_count: int) -> dict:
+        if not self.rerank_factor:
+            return {}
+        return {"candidate_count": match_count * self.rerank_factor}
+
+
+PROFILES = {
+    "full": EmbeddingProfile(
+        name="full",
+        dimensions=FULL_DIMENSIONS,
+        table_name="document_chunks_3072",
+        query_name="match_documents_3072",
+    ),
+    "compact": EmbeddingProfile(
+        name="compact",
+        dimensions=768,
+        table_name="document_chunks_768",
+        query_name="match_documents_768",
+        quantization="half",
+        rerank_factor=4,
+    ),
+    "compact-half": EmbeddingProfile(
+        name="compact-half",
+        dimensions=768,
+        table_name="document_chunks_768_half",
+        query_name="match_documents_768_half",
+        quantization="half",
+        storage="half",
+    ),
+    "compact-binary": EmbeddingProfile(
+        name="compact-binary",
+        dimensions=768,
+        table_name="document_chunks_768",
+        query_name="match_documents_768_binary",
+        quantization="binary",
+        rerank_factor=10,
+    ),
+}
+
+
+def get_embedding_profile(name: Optional[str] = None) -> EmbeddingProfile:
+    name = name or os.environ.get("EMBEDDING_PROFILE", "full")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown EMBEDDING_PROFILE '{name}'. Expected one of: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def get_write_profiles() -> List[EmbeddingProfile]:
+    """Profiles new chunks are written to: the active one plus any listed in
+    EMBEDDING_ALSO_WRITE (comma-separated), used while migrating between profiles."""
+    profiles = [get_embedding_profile()]
+    for name in os.environ.get("EMBEDDING_ALSO_WRITE", "").split(","):
+        name = name.strip()
+        if not name:
+            continue
+        profile = get_embedding_profile(name)
+        # Profiles sharing a table (compact / compact-binary) only need one write
+        if profile.table_name not in {p.table_name for p in profiles}:
+            profiles.append(profile)
+    return profiles
+
+
+def reduce_dimensions(vector: List[float], dimensions: int) -> List[float]:
+    """Truncate a full gemini-embedding-001 vector to `dimensions` and re-normalize it."""
+    if dimensions >= len(vector):
+        return list(vector)
+    reduced = vector[:dimensions]
+    norm = math.sqrt(sum(v * v for v in reduced))
+    if norm == 0:
+        return list(reduced)
+    return [v / norm for v in reduced]
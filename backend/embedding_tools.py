@@ -0,0 +1,193 @@
+"""Maintenance commands for the embedding profiles (see embedding_profiles.py).
+
+    python embedding_tools.py backfill --profile compact
+        Copies every row of document_chunks_3072 into the profile's table. Vectors are
+        derived from the stored 3072-dim ones, so no Gemini calls are made. Rows are
+        upserted by id, so it is safe to re-run.
+
+    python embedding_tools.py benchmark --profiles full compact compact-binary --questions questions.txt
+        Runs the same queries against each profile, scoped to one document like
+        query_document and unscoped, and prints recall@k (vs. the full profile) and RPC
+        latency side by side.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+from supabase import create_client
+from dotenv import load_dotenv
+
+from embedding_profiles import PROFILES, get_embedding_profile, reduce_dimensions
+
+current_dir = Path(__file__).resolve().parent
+root_dir = current_dir.parent
+env_paths = [current_dir / ".env", root_dir / ".env", root_dir.parent / ".env"]
+
+for path in env_paths:
+    if path.exists():
+        load_dotenv(path)
+        break
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
+
+# Bytes per vector in the ANN index for each quantization
+INDEX_BYTES_PER_DIM = {"float": 4, "half": 2, "binary": 1 / 8}
+
+
+def parse_vector(value):
+    # PostgREST returns pgvector columns as their text form, e.g. "[0.1,0.2,...]"
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def backfill(supabase, profile, source, batch_size):
+    if not profile.is_compact:
+        sys.exit(f"Profile '{profile.name}' stores full vectors already; nothing to backfill.")
+
+    print(f"BACKFILL: {source.table_name} -> {profile.table_name} ({profile.dimensions} dims)")
+    last_id = None
+    copied = 0
+    while True:
+        query = supabase.table(source.table_name).select("id, content, metadata, embedding").order("id").limit(batch_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data
+        if not rows:
+            break
+
+        supabase.table(profile.table_name).upsert([
+            {
+                "id": row["id"],
+                "content": row["content"],
+                "metadata": row["metadata"],
+                "embedding": reduce_dimensions(parse_vector(row["embedding"]), profile.dimensions),
+            }
+            for row in rows
+        ]).execute()
+
+        copied += len(rows)
+        last_id = rows[-1]["id"]
+        print(f"BACKFILL: {copied} rows copied")
+
+    print(f"BACKFILL: Done, {copied} rows in {profile.table_name}")
+
+
+def chunk_filter(metadata):
+    # Same scoping query_document applies: one document of one user
+    metadata = metadata or {}
+    return {key: metadata[key] for key in ("document_id", "user_id") if metadata.get(key) is not None}
+
+
+def load_queries(supabase, questions_file, sample, source):
+    """Returns (question, filter) pairs.
+
+    Sampled chunks are queried with their own document's filter. Questions from a file are
+    paired round-robin with the documents of sampled chunks.
+    """
+    rows = supabase.table(source.table_name).select("content, metadata").limit(max(sample * 10, 100)).execute().data
+    rows = [row for row in rows if row.get("content") and chunk_filter(row.get("metadata"))]
+    if not rows:
+        sys.exit(f"No chunks found in {source.table_name}; upload documents before benchmarking.")
+    rows = random.sample(rows, min(sample, len(rows)))
+
+    if not questions_file:
+        return [(row["content"], chunk_filter(row["metadata"])) for row in rows]
+
+    with open(questions_file) as f:
+        questions = [line.strip() for line in f if line.strip()]
+    return [(q, chunk_filter(rows[i % len(rows)]["metadata"])) for i, q in enumerate(questions)]
+
+
+def run_query(supabase, profile, query_vector, k, filter):
+    params = {"query_embedding": query_vector, "filter": filter, "match_count": k, "match_threshold": 0.0}
+    params.update(profile.rpc_params(k))
+    start = time.perf_counter()
+    rows = supabase.rpc(profile.query_name, params).execute().data
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return [row.get("id") or row.get("content") for row in rows], elapsed_ms
+
+
+def benchmark(supabase, profiles, source, queries, k):
+    from gemini_clients import get_embeddings
+
+    if not queries:
+        sys.exit("No benchmark queries: the questions file is empty or --sample is 0.")
+    if not GOOGLE_API_KEY:
+        sys.exit("GOOGLE_API_KEY not set")
+
+    # One embedding call per question; reduced profiles truncate the same vector
+    embeddings = get_embeddings(GOOGLE_API_KEY)
+    query_vectors = [(embeddings.embed_query(q), filter) for q, filter in queries]
+
+    # "filtered" mirrors query_document (one document + user); "unfiltered" searches all rows
+    modes = ("filtered", "unfiltered")
+    results = {(p.name, mode): {"recall": [], "latency": []} for p in profiles for mode in modes}
+    for vector, filter in query_vectors:
+        for mode in modes:
+            mode_filter = filter if mode == "filtered" else {}
+            truth, _ = run_query(supabase, source, vector, k, mode_filter)
+            for profile in profiles:
+                ids, elapsed_ms = run_query(supabase, profile, reduce_dimensions(vector, profile.dimensions), k, mode_filter)
+                results[(profile.name, mode)]["latency"].append(elapsed_ms)
+                if truth:
+                    results[(profile.name, mode)]["recall"].append(len(set(ids) & set(truth)) / len(truth))
+
+    print(f"\n{len(queries)} queries, k={k}, recall measured against '{source.name}'\n")
+    header = (
+        f"{'profile':<16}{'mode':>12}{'dims':>6}{'stored':>8}{'index':>8}{'idx bytes':>11}"
+        f"{f'recall@{k}':>11}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for profile in profiles:
+        for mode in modes:
+            latency = sorted(results[(profile.name, mode)]["latency"])
+            recall = results[(profile.name, mode)]["recall"]
+            p95 = latency[min(len(latency) - 1, int(len(latency) * 0.95))]
+            index_bytes = int(profile.dimensions * INDEX_BYTES_PER_DIM[profile.quantization])
+            recall_text = f"{statistics.mean(recall):.3f}" if recall else "n/a"
+            print(
+                f"{profile.name:<16}{mode:>12}{profile.dimensions:>6}{profile.storage:>8}{profile.quantization:>8}"
+                f"{index_bytes:>11}{recall_text:>11}{statistics.median(latency):>9.1f}"
+                f"{p95:>9.1f}{statistics.mean(latency):>9.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding profile backfill and benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Copy full vectors into a compact profile's table")
+    backfill_parser.add_argument("--profile", default=None, help="Target profile (defaults to EMBEDDING_PROFILE)")
+    backfill_parser.add_argument("--batch-size", type=int, default=200)
+
+    bench_parser = subparsers.add_parser("benchmark", help="Compare recall and latency across profiles")
+    # compact-half / compact-binary need their opt-in SQL scripts, so they are not benchmarked by default
+    bench_parser.add_argument("--profiles", nargs="+", default=["full", "compact"], choices=list(PROFILES))
+    bench_parser.add_argument("--questions", help="Text file with one question per line")
+    bench_parser.add_argument("--sample", type=int, default=50, help="Stored chunks to use as queries when --questions is not given")
+    bench_parser.add_argument("--k", type=int, default=5)
+
+    args = parser.parse_args()
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        sys.exit("SUPABASE_URL or SUPABASE_KEY not set")
+    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    source = PROFILES["full"]
+
+    if args.command == "backfill":
+        backfill(supabase, get_embedding_profile(args.profile), source, args.batch_size)
+    else:
+        profiles = [PROFILES[name] for name in args.profiles]
+        queries = load_queries(supabase, args.questions, args.sample, source)
+        benchmark(supabase, profiles, source, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
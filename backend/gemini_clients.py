@@ -0,0 +1,73 @@
+import os
+from typing import Any, List
+
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
+
+from gemini_scheduler import scheduler
+from embedding_profiles import FULL_DIMENSIONS, reduce_dimensions
+
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+CHAT_MODEL = "gemini-2.5-flash"
+
+# Per-model quotas; override to match the project's Gemini tier.
+scheduler.configure(
+    EMBEDDING_MODEL,
+    rpm=float(os.environ.get("GEMINI_EMBEDDING_RPM", "1500")),
+    max_concurrency=int(os.environ.get("GEMINI_EMBEDDING_CONCURRENCY", "8")),
+)
+scheduler.configure(
+    CHAT_MODEL,
+    rpm=float(os.environ.get("GEMINI_CHAT_RPM", "1000")),
+    max_concurrency=int(os.environ.get("GEMINI_CHAT_CONCURRENCY", "4")),
+)
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Gemini embeddings routed through the shared scheduler.
+
+    Documents are embedded in small batches, each scheduled on its own, so an interactive
+    query can slip in between the batches of a large background ingestion.
+    With `dimensions` below 3072 the vectors are reduced to that size (see embedding_profiles).
+    """
+
+    def __init__(self, google_api_key: str, model: str = EMBEDDING_MODEL, batch_size: int = 32,
+                 dimensions: int = FULL_DIMENSIONS):
+        self.model = model
+        self.batch_size = batch_size
+        self.dimensions = dimensions
+        self._client = GoogleGenerativeAIEmbeddings(model=model, google_api_key=google_api_key)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            vectors.extend(scheduler.call(self.model, lambda: self._client.embed_documents(batch)))
+        return [reduce_dimensions(v, self.dimensions) for v in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = scheduler.call(self.model, lambda: self._client.embed_query(text))
+        return reduce_dimensions(vector, self.dimensions)
+
+
+class ScheduledChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI whose requests go through the shared scheduler."""
+
+    def _generate(self, *args: Any, **kwargs: Any):
+        generate = super()._generate
+        return scheduler.call(self.model, lambda: generate(*args, **kwargs))
+
+    async def _agenerate(self, *args: Any, **kwargs: Any):
+        agenerate = super()._agenerate
+        return await scheduler.acall(self.model, lambda: agenerate(*args, **kwargs))
+
+
+def get_embeddings(google_api_key: str, dimensions: int = FULL_DIMENSIONS) -> ScheduledEmbeddings:
+    return ScheduledEmbeddings(google_api_key=google_api_key, dimensions=dimensions)
+
+
+def get_llm(google_api_key: str, temperature: float = 0.1) -> ScheduledChatGoogleGenerativeAI:
+    # Retries are owned by the scheduler so 429s feed its concurrency control.
+    return ScheduledChatGoogleGenerativeAI(
+        model=CHAT_MODEL, google_api_key=google_api_key, temperature=temperature, max_retries=1
+    )
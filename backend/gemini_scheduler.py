@@ -0,0 +1,289 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+    _RATE_LIMIT_ERRORS = (ResourceExhausted, TooManyRequests)
+except ImportError:
+    _RATE_LIMIT_ERRORS = ()
+
+# Shared scheduling layer for every Gemini call (embeddings + chat).
+# The Inngest worker is served from the same FastAPI process (see `serve` in main.py),
+# so a single in-process scheduler coordinates interactive and background traffic.
+# Limits are per process: with `uvicorn --workers N` (or a separately served Inngest app)
+# each process gets the full configured quota, so divide the limits by N.
+
+
+class Priority(IntEnum):
+    # Lower value wins. query_document runs as INTERACTIVE, the upload endpoint as NORMAL
+    # and process_document_async as BACKGROUND.
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("gemini_priority", default=Priority.NORMAL)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Run every Gemini call made inside this block with the given priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+def _normalize_model(model: str) -> str:
+    return model.split("/", 1)[1] if model.startswith("models/") else model
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    # google.api_core raises ResourceExhausted; langchain_google_genai sometimes re-wraps it,
+    # so also check the cause and fall back to the gRPC status name in the message.
+    while exc is not None:
+        if isinstance(exc, _RATE_LIMIT_ERRORS):
+            return True
+        if getattr(exc, "code", None) == 429 or getattr(exc, "status_code", None) == 429:
+            return True
+        if "RESOURCE_EXHAUSTED" in str(exc):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if getattr(exc, "code", None) in (500, 502, 503, 504):
+        return True
+    text = f"{type(exc).__name__} {exc}"
+    return any(marker in text for marker in ("ServiceUnavailable", "UNAVAILABLE", "DeadlineExceeded", "DEADLINE_EXCEEDED", "InternalServerError"))
+
+
+class ModelLimiter:
+    """Token bucket (requests per minute) plus AIMD concurrency limit for a single model.
+
+    Waiters are served strictly by (priority, arrival order). Whenever max_concurrency > 1,
+    one slot is kept out of reach of background callers, even after 429s have shrunk the
+    limit to its minimum, so an interactive request never queues behind ingestion.
+    """
+
+    def __init__(self, name: str, rpm: float, max_concurrency: int, min_concurrency: int = 1, burst: Optional[float] = None):
+        self.name = name
+        self.rate = rpm / 60.0
+        self.capacity = burst if burst is not None else max(1.0, rpm / 60.0 * 5)
+        self.tokens = self.capacity
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._last_refill = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _slots_for(self, priority: Priority) -> int:
+        slots = max(self.min_concurrency, int(self.limit))
+        if self.max_concurrency <= 1:
+            return slots
+        if priority >= Priority.BACKGROUND:
+            return max(1, slots - 1)
+        # At the minimum limit background holds the only regular slot; the reserved one
+        # lets interactive work run alongside it.
+        return max(2, slots)
+
+    def enqueue(self, priority: Priority) -> tuple:
+        ticket = (int(priority), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def cancel(self, ticket: tuple):
+        with self._cond:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def try_acquire(self, ticket: tuple) -> Optional[float]:
+        """Returns None once the ticket holds a slot, otherwise a suggested wait in seconds."""
+        with self._cond:
+            return self._try_acquire_locked(ticket)
+
+    def _try_acquire_locked(self, ticket: tuple) -> Optional[float]:
+        self._refill(time.monotonic())
+        if self._waiters[0] != ticket:
+            return 0.05
+        if self.in_flight >= self._slots_for(Priority(ticket[0])):
+            return 0.05
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        heapq.heappop(self._waiters)
+        self.tokens -= 1
+        self.in_flight += 1
+        # Let the next waiter re-check now that the head of the queue moved.
+        self._cond.notify_all()
+        return None
+
+    def acquire(self, priority: Priority):
+        ticket = self.enqueue(priority)
+        try:
+            with self._cond:
+                while True:
+                    wait = self._try_acquire_locked(ticket)
+                    if wait is None:
+                        return
+                    self._cond.wait(timeout=wait)
+        except BaseException:
+            self.cancel(ticket)
+            raise
+
+    async def acquire_async(self, priority: Priority):
+        # Polls instead of blocking a thread so cancelling the awaiting task can't leak a slot.
+        ticket = self.enqueue(priority)
+        try:
+            while True:
+                wait = self.try_acquire(ticket)
+                if wait is None:
+                    return
+                await asyncio.sleep(min(wait, 0.25))
+        except BaseException:
+            self.cancel(ticket)
+            raise
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                # Multiplicative decrease; also drain the bucket so queued work pauses briefly.
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self.tokens = min(self.tokens, 0.0)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+            self._cond.notify_all()
+
+
+class GeminiScheduler:
+    """Routes Gemini calls through per-model limiters with jittered retries."""
+
+    def __init__(self, default_rpm: float = 1000, default_concurrency: int = 8, max_attempts: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 30.0):
+        self.default_rpm = default_rpm
+        self.default_concurrency = default_concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, model: str, rpm: Optional[float] = None, max_concurrency: Optional[int] = None) -> ModelLimiter:
+        """Register limits for a model. The first registration wins so limits stay shared."""
+        key = _normalize_model(model)
+        with self._lock:
+            if key not in self._limiters:
+                self._limiters[key] = ModelLimiter(
+                    key,
+                    rpm=rpm or self.default_rpm,
+                    max_concurrency=max_concurrency or self.default_concurrency,
+                )
+            return self._limiters[key]
+
+    def limiter(self, model: str) -> ModelLimiter:
+        return self.configure(model)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from the API and the worker so they don't re-collide.
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _should_retry(self, exc: BaseException, attempt: int) -> bool:
+        return attempt < self.max_attempts - 1 and (is_rate_limited(exc) or is_transient(exc))
+
+    def call(self, model: str, fn: Callable[[], Any], priority: Optional[Priority] = None) -> Any:
+        limiter = self.limiter(model)
+        priority = current_priority() if priority is None else priority
+        attempt = 0
+        while True:
+            limiter.acquire(priority)
+            try:
+                result = fn()
+            except Exception as e:
+                limiter.release(throttled=is_rate_limited(e))
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"SCHEDULER: {limiter.name} attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                limiter.release()
+                raise
+            limiter.release()
+            return result
+
+    async def acall(self, model: str, fn: Callable[[], Awaitable[Any]], priority: Optional[Priority] = None) -> Any:
+        limiter = self.limiter(model)
+        priority = current_priority() if priority is None else priority
+        attempt = 0
+        while True:
+            await limiter.acquire_async(priority)
+            try:
+                result = await fn()
+            except Exception as e:
+                limiter.release(throttled=is_rate_limited(e))
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"SCHEDULER: {limiter.name} attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                limiter.release()
+                raise
+            limiter.release()
+            return result
+
+
+# Blocking calls that may wait in the scheduler (e.g. SupabaseVectorStore.from_documents)
+# run here instead of the loop's default executor, which LangChain uses for the interactive
+# retriever. Otherwise waiting ingestion threads could starve queries of a thread before
+# they ever reach the priority queue.
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("GEMINI_BLOCKING_WORKERS", "4")),
+    thread_name_prefix="gemini-blocking",
+)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call on the dedicated executor, keeping the caller's priority."""
+    ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, lambda: ctx.run(fn, *args, **kwargs))
+
+
+scheduler = GeminiScheduler(
+    default_rpm=float(os.environ.get("GEMINI_DEFAULT_RPM", "1000")),
+    default_concurrency=int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8")),
+    max_attempts=int(os.environ.get("GEMINI_MAX_ATTEMPTS", "5")),
+)
@@ -8,13 +8,14 @@ from pathlib import Path
 # Re-import dependencies for the worker
 import pdfplumber
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import SupabaseVectorStore
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain.schema import Document
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 from inngest_client import inngest_client
+from gemini_scheduler import Priority, request_priority, run_blocking
+from gemini_clients import get_llm
+from chunk_store import store_chunks
 
 # --- Init Logic (Duplicated for Worker safety) ---
 current_dir = Path(__file__).resolve().parent
@@ -46,7 +47,6 @@ import inngest
     trigger=inngest.TriggerEvent(event="app/document.uploaded"),
 )
 async def process_document_async(*args, **kwargs):
-    import traceback
     print(f"WORKER: Starting process_document_async with args={len(args)} kwargs={kwargs.keys()}")
     
     # Attempt to extract ctx and step from arguments
@@ -58,6 +58,13 @@ async def process_document_async(*args, **kwargs):
     if not step and len(args) > 1:
         step = args[1]
         
+    # Ingestion always yields to interactive queries
+    with request_priority(Priority.BACKGROUND):
+        return await _process_document(ctx, step)
+
+
+async def _process_document(ctx, step):
+    import traceback
     try:
         # Accessing event data: Check both attribute and dict access to be safe
         event_data = ctx.event.data if hasattr(ctx.event, 'data') else ctx.event.get('data', {})
@@ -74,8 +81,7 @@ async def process_document_async(*args, **kwargs):
         if not GOOGLE_API_KEY:
              raise ValueError("GOOGLE_API_KEY not set")
 
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001", google_api_key=GOOGLE_API_KEY)
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=GOOGLE_API_KEY, temperature=0.1)
+        llm = get_llm(GOOGLE_API_KEY)
 
         temp_dir = tempfile.gettempdir()
         temp_filename = os.path.join(temp_dir, f"{uuid.uuid4()}.pdf")
@@ -118,10 +124,8 @@ async def process_document_async(*args, **kwargs):
         # 3. Store Vectors
         print(f"WORKER: Storing {len(docs)} vectors")
         if docs:
-            SupabaseVectorStore.from_documents(
-                docs, embeddings, client=supabase, 
-                table_name="document_chunks_3072", query_name="match_documents_3072"
-            )
+            # Off the event loop so throttled batches don't stall interactive requests
+            await run_blocking(store_chunks, supabase, docs, GOOGLE_API_KEY)
 
         # 4. Generate AI Report
         print("WORKER: Generating AI Report")
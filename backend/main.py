@@ -15,6 +15,10 @@ from dotenv import load_dotenv
 from inngest.fast_api import serve
 from inngest_client import inngest_client
 from inngest_functions import process_document_async
+from gemini_scheduler import Priority, request_priority, run_blocking
+from gemini_clients import get_embeddings, get_llm
+from embedding_profiles import get_embedding_profile, get_write_profiles
+from chunk_store import store_chunks
 
 # --- RAG / LangChain Imports ---
 import pdfplumber
@@ -28,7 +32,6 @@ except ImportError as e:
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import SupabaseVectorStore
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
@@ -68,12 +71,15 @@ if not GOOGLE_API_KEY:
     print("Error: GOOGLE_API_KEY is missing.")
 
 # 1. Initialize Embeddings (Gemini)
-# Using gemini-embedding-001 as requested
-embeddings = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001", google_api_key=GOOGLE_API_KEY)
+# Using gemini-embedding-001 as requested, routed through the shared rate limiter.
+# EMBEDDING_PROFILE picks the vector size and table ("full" = 3072 dims, "compact" = 768 dims)
+embedding_profile = get_embedding_profile()
+print(f"DEBUG: Embedding profile '{embedding_profile.name}', writing to {[p.table_name for p in get_write_profiles()]}")
+embeddings = get_embeddings(GOOGLE_API_KEY, dimensions=embedding_profile.dimensions)
 
 # 2. LLM Model (for Chat)
 # Using Gemini 2.5 Flash as requested by user
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=GOOGLE_API_KEY, temperature=0.1)
+llm = get_llm(GOOGLE_API_KEY)
 
 
 
@@ -94,6 +100,8 @@ class CustomSupabaseVectorStore(SupabaseVectorStore):
             "match_count": k,
             "match_threshold": score_threshold or 0.0
         }
+        # Compact profiles re-rank a larger candidate pool at full precision
+        match_documents_params.update(embedding_profile.rpc_params(k))
         
         query_builder = self._client.rpc(self.query_name, match_documents_params)
 
@@ -218,17 +226,12 @@ async def process_document(file: UploadFile = File(...), user: dict = Depends(ge
             for doc in docs:
                 doc.metadata["user_id"] = user.id
 
-            vector_store = SupabaseVectorStore.from_documents(
-                docs,
-                embeddings,
-                client=supabase,
-                table_name="document_chunks_3072",
-                query_name="match_documents_3072"
-            )
+            # Run in a thread: the scheduler may hold this call back, and it must not block the event loop.
+            # Writes to the active profile's table (plus EMBEDDING_ALSO_WRITE during a migration)
+            await run_blocking(store_chunks, supabase, docs, GOOGLE_API_KEY)
         except Exception as vec_err:
              print(f"Vector Store Error: {vec_err}")
         
-        print(f"DEBUG: Successfully inserted {len(docs)} chunks into 'document_chunks' table.")
 
         # 2a. Upload actual PDF to Supabase Storage (for frontend viewer)
         try:
@@ -273,7 +276,7 @@ async def process_document(file: UploadFile = File(...), user: dict = Depends(ge
         """
         
         try:
-            analysis_response = llm.invoke(analysis_prompt)
+            analysis_response = await llm.ainvoke(analysis_prompt)
             content_str = analysis_response.content
             print(f"DEBUG: Raw LLM Response: {content_str[:500]}...") # Log start of response
 
@@ -361,8 +364,8 @@ async def query_document(payload: QueryRequest, user: dict = Depends(get_current
         vector_store = CustomSupabaseVectorStore(
             embedding=embeddings,
             client=supabase,
-            table_name="document_chunks_3072",
-            query_name="match_documents_3072"
+            table_name=embedding_profile.table_name,
+            query_name=embedding_profile.query_name
         )
         
         retriever = vector_store.as_retriever(
@@ -381,8 +384,9 @@ async def query_document(payload: QueryRequest, user: dict = Depends(get_current
             return_source_documents=True # Get metadata back!
         )
         
-        # 3. Run Query
-        result = qa_chain.invoke({"query": payload.question})
+        # 3. Run Query (interactive traffic pre-empts background ingestion)
+        with request_priority(Priority.INTERACTIVE):
+            result = await qa_chain.ainvoke({"query": payload.question})
         
         answer_text = result['result']
         source_docs = result['source_documents']
@@ -425,9 +429,11 @@ async def delete_document(document_id: str, user: dict = Depends(get_current_use
         # We enforce user_id to ensure users can only delete their own docs
         supabase.table("documents").delete().eq("id", document_id).eq("user_id", user.id).execute()
         
-        # 2. Delete from 'document_chunks_3072' table (Vector Store)
-        # We use the new table for 3072 dimensions
-        supabase.table("document_chunks_3072").delete().match({"metadata->>document_id": document_id, "metadata->>user_id": user.id}).execute()
+        # 2. Delete from the chunks tables (Vector Store): the active profile's table plus any
+        # EMBEDDING_ALSO_WRITE mirror, which is also where backfilled rows live during a migration
+        chunk_filter = {"metadata->>document_id": document_id, "metadata->>user_id": user.id}
+        for profile in get_write_profiles():
+            supabase.table(profile.table_name).delete().match(chunk_filter).execute()
         
         # 3. Delete from Storage ('pdfs' bucket)
         # Use the correct file_path from metadata
@@ -0,0 +1,70 @@
+-- Compact embedding profile (EMBEDDING_PROFILE=compact)
+-- Run once in the Supabase SQL editor. Requires pgvector >= 0.7 (halfvec).
+--
+-- Rows keep 768-dim float vectors (1/4 the size of document_chunks_3072). Unfiltered matches
+-- pick candidates by half-precision distance and re-rank them against the float vectors.
+-- The half-precision HNSW index that speeds that up lives in compact_embeddings_ann_index.sql:
+-- query_document always filters (exact search), so only unfiltered queries, today just
+-- `embedding_tools.py benchmark`, would read it.
+-- Optional variants: compact_embeddings_binary.sql, compact_embeddings_half.sql
+
+create extension if not exists vector;
+
+create table if not exists document_chunks_768 (
+  id uuid primary key,
+  content text,
+  metadata jsonb,
+  embedding vector(768)
+);
+
+create index if not exists document_chunks_768_metadata_idx
+  on document_chunks_768 using gin (metadata);
+
+create or replace function match_documents_768 (
+  query_embedding vector(768),
+  filter jsonb default '{}',
+  match_count int default 5,
+  match_threshold float default 0,
+  candidate_count int default null
+) returns table (id uuid, content text, metadata jsonb, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+begin
+  if coalesce(filter, '{}'::jsonb) = '{}'::jsonb then
+    -- Unfiltered: ANN over the half-precision index, then re-rank at full precision.
+    -- An HNSW scan returns at most hnsw.ef_search rows (default 40, max 1000), so raise it
+    -- to the candidate pool for this transaction.
+    perform set_config('hnsw.ef_search', least(1000, greatest(40, coalesce(candidate_count, match_count * 4)))::text, true);
+    return query
+    with candidates as (
+      select c.id, c.content, c.metadata, c.embedding
+      from document_chunks_768 c
+      order by c.embedding::halfvec(768) <=> query_embedding::halfvec(768)
+      limit coalesce(candidate_count, match_count * 4)
+    )
+    select candidates.id, candidates.content, candidates.metadata,
+           (1 - (candidates.embedding <=> query_embedding))::float as similarity
+    from candidates
+    where 1 - (candidates.embedding <=> query_embedding) >= match_threshold
+    order by candidates.embedding <=> query_embedding
+    limit match_count;
+  else
+    -- Filtered (query_document always scopes to one document and user): an HNSW scan only
+    -- visits ~hnsw.ef_search neighbours table-wide and drops non-matching rows afterwards,
+    -- so search the filtered rows exactly instead. One document's chunks are a small set.
+    return query
+    with scoped as materialized (
+      select c.id, c.content, c.metadata, c.embedding
+      from document_chunks_768 c
+      where c.metadata @> filter
+    )
+    select scoped.id, scoped.content, scoped.metadata,
+           (1 - (scoped.embedding <=> query_embedding))::float as similarity
+    from scoped
+    where 1 - (scoped.embedding <=> query_embedding) >= match_threshold
+    order by scoped.embedding <=> query_embedding
+    limit match_count;
+  end if;
+end;
+$$;
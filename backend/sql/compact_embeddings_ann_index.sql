@@ -0,0 +1,31 @@
+-- Opt-in HNSW index for one compact profile
+-- Run after the profile's own script(s). Requires pgvector >= 0.7.
+--
+-- query_document always filters by document and user, and filtered matches search that
+-- document's chunks exactly, so the app itself never reads these indexes. Only unfiltered
+-- queries (today just `embedding_tools.py benchmark`) use them. Each index costs memory and
+-- insert time, so only create one if you run unfiltered searches.
+--
+-- Set `target_profile` below to your EMBEDDING_PROFILE; only that profile's index is built.
+
+do $$
+declare
+  target_profile text := 'compact';  -- 'compact', 'compact-binary' or 'compact-half'
+begin
+  if target_profile = 'compact' then
+    -- half-precision index over the float rows
+    execute 'create index if not exists document_chunks_768_embedding_half_idx
+      on document_chunks_768 using hnsw ((embedding::halfvec(768)) halfvec_cosine_ops)';
+  elsif target_profile = 'compact-binary' then
+    -- 1 bit per dimension over the float rows
+    execute 'create index if not exists document_chunks_768_embedding_binary_idx
+      on document_chunks_768 using hnsw ((binary_quantize(embedding)::bit(768)) bit_hamming_ops)';
+  elsif target_profile = 'compact-half' then
+    -- index on the stored halfvec column
+    execute 'create index if not exists document_chunks_768_half_embedding_idx
+      on document_chunks_768_half using hnsw (embedding halfvec_cosine_ops)';
+  else
+    raise exception 'Unknown target_profile %', target_profile;
+  end if;
+end;
+$$;
@@ -0,0 +1,53 @@
+-- Match function for EMBEDDING_PROFILE=compact-binary
+-- Run after compact_embeddings.sql (same document_chunks_768 table). Requires pgvector >= 0.7
+-- (binary_quantize).
+--
+-- Unfiltered matches pick candidates by 1-bit-per-dimension Hamming distance and re-rank a
+-- larger pool against the float vectors. The binary HNSW index is opt-in
+-- (compact_embeddings_ann_index.sql) since only unfiltered queries would read it.
+
+create or replace function match_documents_768_binary (
+  query_embedding vector(768),
+  filter jsonb default '{}',
+  match_count int default 5,
+  match_threshold float default 0,
+  candidate_count int default null
+) returns table (id uuid, content text, metadata jsonb, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+begin
+  if coalesce(filter, '{}'::jsonb) = '{}'::jsonb then
+    -- Unfiltered: ANN over the binary index, then re-rank at full precision. Raise
+    -- hnsw.ef_search (default 40, max 1000) so the scan can return the whole candidate pool.
+    perform set_config('hnsw.ef_search', least(1000, greatest(40, coalesce(candidate_count, match_count * 10)))::text, true);
+    return query
+    with candidates as (
+      select c.id, c.content, c.metadata, c.embedding
+      from document_chunks_768 c
+      order by binary_quantize(c.embedding)::bit(768) <~> binary_quantize(query_embedding)
+      limit coalesce(candidate_count, match_count * 10)
+    )
+    select candidates.id, candidates.content, candidates.metadata,
+           (1 - (candidates.embedding <=> query_embedding))::float as similarity
+    from candidates
+    where 1 - (candidates.embedding <=> query_embedding) >= match_threshold
+    order by candidates.embedding <=> query_embedding
+    limit match_count;
+  else
+    -- Filtered: exact search over the matching rows (see match_documents_768)
+    return query
+    with scoped as materialized (
+      select c.id, c.content, c.metadata, c.embedding
+      from document_chunks_768 c
+      where c.metadata @> filter
+    )
+    select scoped.id, scoped.content, scoped.metadata,
+           (1 - (scoped.embedding <=> query_embedding))::float as similarity
+    from scoped
+    where 1 - (scoped.embedding <=> query_embedding) >= match_threshold
+    order by scoped.embedding <=> query_embedding
+    limit match_count;
+  end if;
+end;
+$$;
@@ -0,0 +1,58 @@
+-- Half-precision storage for EMBEDDING_PROFILE=compact-half
+-- Run once in the Supabase SQL editor. Requires pgvector >= 0.7 (halfvec).
+--
+-- Rows store 768-dim halfvec vectors (1/8 the size of document_chunks_3072). No full-precision
+-- copy is kept, so there is no re-rank pass. The HNSW index is opt-in
+-- (compact_embeddings_ann_index.sql) since only unfiltered queries would read it.
+
+create extension if not exists vector;
+
+create table if not exists document_chunks_768_half (
+  id uuid primary key,
+  content text,
+  metadata jsonb,
+  embedding halfvec(768)
+);
+
+create index if not exists document_chunks_768_half_metadata_idx
+  on document_chunks_768_half using gin (metadata);
+
+create or replace function match_documents_768_half (
+  query_embedding vector(768),
+  filter jsonb default '{}',
+  match_count int default 5,
+  match_threshold float default 0,
+  candidate_count int default null
+) returns table (id uuid, content text, metadata jsonb, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+begin
+  if coalesce(filter, '{}'::jsonb) = '{}'::jsonb then
+    -- An HNSW scan returns at most hnsw.ef_search rows (default 40, max 1000)
+    perform set_config('hnsw.ef_search', least(1000, greatest(40, match_count))::text, true);
+    return query
+    select c.id, c.content, c.metadata,
+           (1 - (c.embedding <=> query_embedding::halfvec(768)))::float as similarity
+    from document_chunks_768_half c
+    where 1 - (c.embedding <=> query_embedding::halfvec(768)) >= match_threshold
+    order by c.embedding <=> query_embedding::halfvec(768)
+    limit match_count;
+  else
+    -- Filtered: exact search over the matching rows. The materialized CTE keeps the planner
+    -- from using the HNSW index, which would drop rows outside its ~ef_search neighbours.
+    return query
+    with scoped as materialized (
+      select c.id, c.content, c.metadata, c.embedding
+      from document_chunks_768_half c
+      where c.metadata @> filter
+    )
+    select scoped.id, scoped.content, scoped.metadata,
+           (1 - (scoped.embedding <=> query_embedding::halfvec(768)))::float as similarity
+    from scoped
+    where 1 - (scoped.embedding <=> query_embedding::halfvec(768)) >= match_threshold
+    order by scoped.embedding <=> query_embedding::halfvec(768)
+    limit match_count;
+  end if;
+end;
+$$;
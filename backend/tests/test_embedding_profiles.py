@@ -0,0 +1,26 @@
+import math
+
+import pytest
+
+from embedding_profiles import get_embedding_profile, get_write_profiles, reduce_dimensions
+
+
+def test_reduce_dimensions_truncates_and_normalizes():
+    reduced = reduce_dimensions([3.0, 4.0, 12.0], 2)
+    assert reduced == pytest.approx([0.6, 0.8])
+    assert math.isclose(sum(v * v for v in reduced), 1.0)
+    assert reduce_dimensions([1.0, 2.0], 3072) == [1.0, 2.0]
+
+
+def test_unknown_profile_raises():
+    with pytest.raises(ValueError):
+        get_embedding_profile("tiny")
+
+
+def test_write_profiles_include_migration_targets_once_per_table(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_PROFILE", "compact")
+    monkeypatch.setenv("EMBEDDING_ALSO_WRITE", "full, compact-binary")
+    assert [p.name for p in get_write_profiles()] == ["compact", "full"]
+
+    monkeypatch.delenv("EMBEDDING_ALSO_WRITE")
+    assert [p.name for p in get_write_profiles()] == ["compact"]
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from gemini_scheduler import GeminiScheduler, ModelLimiter, Priority, is_rate_limited
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+def make_limiter(max_concurrency):
+    # High rpm so the token bucket never gets in the way of concurrency checks
+    return ModelLimiter("test-model", rpm=60000, max_concurrency=max_concurrency)
+
+
+def test_interactive_waiter_served_before_earlier_background():
+    limiter = make_limiter(1)
+    limiter.acquire(Priority.NORMAL)
+
+    background = limiter.enqueue(Priority.BACKGROUND)
+    interactive = limiter.enqueue(Priority.INTERACTIVE)
+    assert limiter.try_acquire(interactive) is not None
+
+    limiter.release()
+    assert limiter.try_acquire(background) is not None
+    assert limiter.try_acquire(interactive) is None
+    assert limiter.in_flight == 1
+
+
+def test_background_leaves_last_slot_free():
+    limiter = make_limiter(2)
+    limiter.acquire(Priority.BACKGROUND)
+
+    background = limiter.enqueue(Priority.BACKGROUND)
+    assert limiter.try_acquire(background) is not None
+    limiter.cancel(background)
+
+    interactive = limiter.enqueue(Priority.INTERACTIVE)
+    assert limiter.try_acquire(interactive) is None
+    assert limiter.in_flight == 2
+
+
+def test_slot_reserved_for_interactive_at_minimum_limit():
+    limiter = make_limiter(8)
+    for _ in range(4):
+        limiter.acquire(Priority.BACKGROUND)
+        limiter.release(throttled=True)
+    assert limiter.limit == 1
+    limiter.tokens = limiter.capacity
+
+    limiter.acquire(Priority.BACKGROUND)
+    background = limiter.enqueue(Priority.BACKGROUND)
+    assert limiter.try_acquire(background) is not None
+    limiter.cancel(background)
+
+    interactive = limiter.enqueue(Priority.INTERACTIVE)
+    assert limiter.try_acquire(interactive) is None
+    assert limiter.in_flight == 2
+
+
+def test_rate_limit_halves_concurrency_and_retries():
+    scheduler = GeminiScheduler(default_rpm=60000, default_concurrency=8, base_delay=0)
+    limiter = scheduler.limiter("test-model")
+    limits_seen = []
+
+    def flaky():
+        limits_seen.append(limiter.limit)
+        if len(limits_seen) < 3:
+            raise RateLimitError("quota exceeded")
+        return "ok"
+
+    assert scheduler.call("test-model", flaky) == "ok"
+    assert limits_seen == [8, 4, 2]
+    assert limiter.in_flight == 0
+
+
+def test_non_rate_limit_errors_are_not_retried():
+    scheduler = GeminiScheduler(default_rpm=60000, base_delay=0)
+    calls = []
+
+    def forbidden():
+        calls.append(1)
+        raise PermissionError("403 quota project not set for request 4291")
+
+    with pytest.raises(PermissionError):
+        scheduler.call("test-model", forbidden)
+    assert len(calls) == 1
+    assert scheduler.limiter("test-model").limit == scheduler.default_concurrency
+
+
+def test_is_rate_limited_matches_status_or_grpc_code_not_bare_429():
+    assert is_rate_limited(RateLimitError())
+    assert is_rate_limited(RuntimeError("429 RESOURCE_EXHAUSTED"))
+    assert not is_rate_limited(RuntimeError("quota project not set (id 429)"))
+
+    wrapped = RuntimeError("embedding failed")
+    wrapped.__cause__ = RateLimitError()
+    assert is_rate_limited(wrapped)
+
+
+def test_cancelled_async_waiter_releases_ticket():
+    limiter = make_limiter(1)
+
+    async def scenario():
+        limiter.acquire(Priority.NORMAL)
+        waiter = asyncio.create_task(limiter.acquire_async(Priority.INTERACTIVE))
+        await asyncio.sleep(0.01)
+        assert len(limiter._waiters) == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter._waiters == []
+        assert limiter.in_flight == 1
+
+        # The slot is still usable by the next caller once released
+        limiter.release()
+        await asyncio.wait_for(limiter.acquire_async(Priority.BACKGROUND), timeout=1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())